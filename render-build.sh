@@ -5,7 +5,7 @@ set -o errexit
 apt-get update
 
 # Instalar Tesseract OCR e idioma português
-apt-get install -y tesseract-ocr tesseract-ocr-por
+apt-get install -y tesseract-ocr tesseract-ocr-por libtesseract-dev libleptonica-dev pkg-config g++
 
 # Instalar dependências Python
 pip install --upgrade pip
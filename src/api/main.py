@@ -5,20 +5,21 @@ COM SISTEMA DE AUTENTICAÇÃO E ACESSO RÁPIDO
 
 from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from datetime import datetime
 import uuid
-import base64
+import asyncio
 import logging
 import sys
 import os
-import json
+import orjson
 
 # Adicionar pasta src ao path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Imports locais
 from database.mongodb import connect_mongodb, close_mongodb, get_db
-from redis import Redis
+import redis.asyncio as redis
 
 # Configurações
 from config import settings
@@ -27,15 +28,30 @@ from config import settings
 from auth.routes import router as auth_router
 from auth.middleware import verificar_token_opcional
 
+# Pipeline ML
+from ml.ocr import extrair_texto_tesseract, iniciar_pool_tesseract, fechar_pool_tesseract
+from ml.parser import parse_dados_boleto
+from ml.validator import validar_boleto_febraban
+from ml.model import carregar_modelo, preparar_features, predizer_fraude
+from ml.explainer import gerar_explicacao_humanizada
+
 # Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Campos internos que não saem na consulta de análise
+_PROJECAO_ANALISE = {'ip_address': 0}
+
+# Upload
+_MAX_UPLOAD = 10 * 1024 * 1024  # 10MB
+_CHUNK_SIZE = 64 * 1024  # 64KB
+
 # Criar app FastAPI
 app = FastAPI(
     title="Detector de Boletos Falsos API",
     description="API para análise e detecção de fraudes em boletos bancários com autenticação",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS
@@ -51,6 +67,20 @@ app.add_middleware(
 app.include_router(auth_router)
 
 
+# =============================================
+# HELPERS
+# =============================================
+
+async def _enfileirar_job(redis_conn, analise_id: str, file_bytes: memoryview, job_payload: bytes):
+    """Grava o arquivo no Redis e adiciona a referência na fila de jobs"""
+    # Arquivo vai como blob binário; a fila leva só a referência
+    # Pipeline: os dois comandos seguem em um único round-trip, na ordem
+    async with redis_conn.pipeline(transaction=False) as pipe:
+        pipe.set(f"boletos:file:{analise_id}", file_bytes, ex=settings.redis_file_ttl)
+        pipe.rpush('boletos:jobs', job_payload)
+        await pipe.execute()
+
+
 # =============================================
 # ENDPOINTS
 # =============================================
@@ -133,7 +163,7 @@ async def analisar_boleto(
                 upsert=True
             )
             
-            logger.info(f"📊 Acesso anônimo registrado: {ip_address}")
+            logger.info("📊 Acesso anônimo registrado: %s", ip_address)
         
         # 1. Validar tipo de arquivo
         allowed_types = ['image/jpeg', 'image/png', 'application/pdf']
@@ -143,15 +173,18 @@ async def analisar_boleto(
                 detail=f"Tipo de arquivo inválido. Aceitos: {', '.join(allowed_types)}"
             )
         
-        # 2. Validar tamanho (max 10MB)
-        file_bytes = await file.read()
-        file_size = len(file_bytes)
+        # 2. Ler em blocos validando tamanho (max 10MB)
+        buffer = bytearray()
+        file_size = 0
         
-        if file_size > 10 * 1024 * 1024:  # 10MB
-            raise HTTPException(
-                status_code=400,
-                detail="Arquivo muito grande. Máximo: 10MB"
-            )
+        while chunk := await file.read(_CHUNK_SIZE):
+            file_size += len(chunk)
+            if file_size > _MAX_UPLOAD:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail="Arquivo muito grande. Máximo: 10MB"
+                )
+            buffer.extend(chunk)
         
         if file_size == 0:
             raise HTTPException(
@@ -159,15 +192,12 @@ async def analisar_boleto(
                 detail="Arquivo vazio"
             )
         
-        # 3. Converter para base64
-        file_base64 = base64.b64encode(file_bytes).decode('utf-8')
-        
-        # 4. Gerar ID único
+        # 3. Gerar ID único
         analise_id = str(uuid.uuid4())
         
-        logger.info(f"📄 Recebido arquivo: {file.filename} ({file_size} bytes) - ID: {analise_id}")
+        logger.info("📄 Recebido arquivo: %s (%d bytes) - ID: %s", file.filename, file_size, analise_id)
         
-        # 5. Salvar no MongoDB
+        # 4. Salvar no MongoDB
         db = get_db()
         analise_doc = {
             '_id': analise_id,
@@ -185,26 +215,37 @@ async def analisar_boleto(
         else:
             analise_doc['ip_address'] = request.client.host
         
+        # O documento precisa existir antes do job: o worker só faz update_one
         await db.analises.insert_one(analise_doc)
         
-        logger.info(f"✅ Análise salva no MongoDB: {analise_id}")
-        
-        # 6. Adicionar na fila Redis
-        redis_conn = Redis.from_url(settings.redis_url)
+        logger.info("✅ Análise salva no MongoDB: %s", analise_id)
         
-        job_data = {
+        # 5. Adicionar na fila Redis
+        job_payload = orjson.dumps({
             'analise_id': analise_id,
-            'file_base64': file_base64,
             'file_type': file.content_type,
             'user_id': user_id,
             'is_authenticated': is_authenticated
-        }
-        
-        redis_conn.rpush('boletos:jobs', json.dumps(job_data))
+        })
+        
+        try:
+            # memoryview: o redis-py envia o buffer sem copiar o arquivo de novo
+            await _enfileirar_job(app.state.redis, analise_id, memoryview(buffer), job_payload)
+        except Exception as e:
+            # Sem job na fila a análise ficaria 'processing' para sempre
+            await db.analises.update_one(
+                {'_id': analise_id},
+                {'$set': {
+                    'status': 'failed',
+                    'error': f"Erro ao enfileirar análise: {str(e)}",
+                    'failedAt': datetime.utcnow()
+                }}
+            )
+            raise
         
-        logger.info(f"✅ Job adicionado à fila: {analise_id}")
+        logger.info("✅ Job adicionado à fila: %s", analise_id)
         
-        # 7. Incrementar contador do usuário se autenticado
+        # 6. Incrementar contador do usuário se autenticado
         if is_authenticated:
             from bson import ObjectId
             await db.usuarios.update_one(
@@ -212,7 +253,7 @@ async def analisar_boleto(
                 {"$inc": {"analises_realizadas": 1}}
             )
         
-        # 8. Retornar resposta
+        # 7. Retornar resposta
         response = {
             "id": analise_id,
             "status": "processing",
@@ -235,7 +276,7 @@ async def analisar_boleto(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ Erro ao processar upload: {str(e)}")
+        logger.error("❌ Erro ao processar upload: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Erro interno ao processar arquivo: {str(e)}"
@@ -258,7 +299,7 @@ async def consultar_analise(
         
         # Buscar no MongoDB
         db = get_db()
-        analise = await db.analises.find_one({'_id': analise_id})
+        analise = await db.analises.find_one({'_id': analise_id}, projection=_PROJECAO_ANALISE)
         
         if not analise:
             raise HTTPException(
@@ -292,7 +333,7 @@ async def consultar_analise(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ Erro ao consultar análise: {str(e)}")
+        logger.error("❌ Erro ao consultar análise: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Erro ao consultar análise: {str(e)}"
@@ -341,7 +382,7 @@ async def obter_historico(
         }
         
     except Exception as e:
-        logger.error(f"❌ Erro ao buscar histórico: {str(e)}")
+        logger.error("❌ Erro ao buscar histórico: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Erro ao buscar histórico"
@@ -395,31 +436,29 @@ async def test_ocr(
                 upsert=True
             )
         
-        # Imports
-        from ml.ocr import extrair_texto_tesseract
-        from ml.parser import parse_dados_boleto
-        from ml.validator import validar_boleto_febraban
-        from ml.model import carregar_modelo, preparar_features, predizer_fraude
-        from ml.explainer import gerar_explicacao_humanizada
-        
         # Ler arquivo
         file_bytes = await file.read()
         
-        logger.info(f"📄 Processando: {file.filename}")
+        logger.info("📄 Processando: %s", file.filename)
+        
+        # Etapas CPU-bound rodam em threads para não bloquear o event loop
         
         # 1. OCR
-        texto = extrair_texto_tesseract(file_bytes)
+        texto = await asyncio.to_thread(extrair_texto_tesseract, file_bytes)
         
         # 2. Parser
-        dados = parse_dados_boleto(texto)
+        dados = await asyncio.to_thread(parse_dados_boleto, texto)
         
         # 3. Validação FEBRABAN
-        validacao = validar_boleto_febraban(dados)
+        validacao = await asyncio.to_thread(validar_boleto_febraban, dados)
+        
+        # 4. Modelo ML (carregado no startup; nova tentativa se falhou lá)
+        modelo = getattr(app.state, 'model', None)
+        if modelo is None:
+            modelo = await asyncio.to_thread(carregar_modelo)
         
-        # 4. Modelo ML
-        modelo = carregar_modelo()
         features = preparar_features(dados)
-        predicao_ml = predizer_fraude(modelo, features)
+        predicao_ml = await asyncio.to_thread(predizer_fraude, modelo, features)
         
         # 5. Explicabilidade
         explicacao = gerar_explicacao_humanizada(
@@ -471,14 +510,14 @@ async def test_ocr(
         else:
             response["historico_disponivel"] = True
         
-        logger.info(f"✅ Análise concluída: {file.filename}")
+        logger.info("✅ Análise concluída: %s", file.filename)
         
         return response
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ Erro no teste: {str(e)}")
+        logger.error("❌ Erro no teste: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Erro: {str(e)}"
@@ -493,11 +532,20 @@ async def test_ocr(
 async def startup_event():
     """Executado quando a API inicia"""
     logger.info("🚀 API iniciada!")
-    logger.info(f"📊 Ambiente: {settings.environment}")
+    logger.info("📊 Ambiente: %s", settings.environment)
     
     # Conectar MongoDB
     await connect_mongodb(settings.mongo_uri, settings.mongo_db_name)
     
+    # Cliente Redis persistente (pool compartilhado entre requisições)
+    # Pool bloqueante: com todas as conexões ocupadas, aguarda até 10s em vez de falhar
+    redis_pool = redis.BlockingConnectionPool.from_url(
+        settings.redis_url,
+        max_connections=settings.redis_max_connections,
+        timeout=10
+    )
+    app.state.redis = redis.Redis(connection_pool=redis_pool)
+    
     # Criar índices
     db = get_db()
     await db.usuarios.create_index("email", unique=True)
@@ -505,6 +553,16 @@ async def startup_event():
     await db.analises.create_index("user_id")
     
     logger.info("✅ Índices criados!")
+    
+    # Carregar modelo ML uma única vez
+    try:
+        app.state.model = carregar_modelo()
+    except Exception as e:
+        app.state.model = None
+        logger.warning("⚠️ Modelo não carregado no startup: %s", e)
+    
+    # Pré-carregar Tesseract (se tesserocr disponível)
+    iniciar_pool_tesseract(settings.tesseract_pool_size)
 
 
 @app.on_event("shutdown")
@@ -514,6 +572,13 @@ async def shutdown_event():
     
     # Fechar MongoDB
     await close_mongodb()
+    
+    # Fechar Redis
+    await app.state.redis.aclose()
+    await app.state.redis.connection_pool.disconnect()
+    
+    # Liberar Tesseract (pode aguardar OCRs em andamento; fora do event loop)
+    await asyncio.to_thread(fechar_pool_tesseract)
 
 
 # =============================================
@@ -522,9 +587,16 @@ async def shutdown_event():
 
 if __name__ == "__main__":
     import uvicorn
+    
+    # reload só em desenvolvimento (incompatível com múltiplos workers)
+    is_dev = settings.environment == "development"
+    
     uvicorn.run(
         "main:app",
         host=settings.api_host,
         port=settings.api_port,
-        reload=True
+        loop="uvloop" if os.name != 'nt' else "asyncio",  # uvloop não suporta Windows
+        http="httptools",
+        reload=is_dev,
+        workers=None if is_dev else settings.api_workers
     )
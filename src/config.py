@@ -16,11 +16,20 @@ class Settings(BaseSettings):
     
     # Redis
     redis_url: str
+    redis_max_connections: int = 50  # por processo da API
+    # Tempo (s) que o arquivo enviado fica no Redis aguardando o worker;
+    # jobs consumidos depois disso são marcados como 'failed'
+    redis_file_ttl: int = 3600
     
     # API
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     environment: str = "development"
+    # Processos uvicorn (Dockerfile: --workers $API_WORKERS; main.py: fora de
+    # development). Cada processo faz o startup completo: seu próprio pool
+    # Redis (redis_max_connections), seu pool Tesseract (tesseract_pool_size)
+    # e sua cópia do modelo. Memória e conexões crescem com api_workers.
+    api_workers: int = 1
     
     # CORS
     allowed_origins: list = [
@@ -33,6 +42,9 @@ class Settings(BaseSettings):
     # Sentry (opcional)
     sentry_dsn: str = ""
     
+    # OCR
+    tesseract_pool_size: int = 2  # instâncias residentes por processo
+    
     # Paths
     model_path: str = "src/models/modelo_boleto.pkl"
     
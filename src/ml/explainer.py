@@ -6,11 +6,34 @@ COM LINGUAGEM CAUTELOSA E PROFISSIONAL
 
 import numpy as np
 from typing import Dict, List, Optional
-from datetime import datetime
+from datetime import datetime, timezone
+from types import MappingProxyType
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Tabelas fixas por gravidade (montadas uma única vez, somente leitura)
+IMPACTO_GRAVIDADE = MappingProxyType({
+    'critica': 95,
+    'alta': 80,
+    'media': 60,
+    'baixa': 30
+})
+
+CORES_GRAVIDADE = MappingProxyType({
+    'critica': 'danger',
+    'alta': 'warning',
+    'media': 'medium',
+    'baixa': 'primary'
+})
+
+# Palavras-chave por gravidade, em ordem de prioridade
+PALAVRAS_GRAVIDADE = (
+    ('critica', ('inválido', 'incorreto', 'falha crítica')),
+    ('alta', ('dígito verificador', 'código de barras')),
+    ('media', ('formato', 'incompleto')),
+)
+
 
 def gerar_explicacao_humanizada(
     dados_extraidos: Dict,
@@ -90,10 +113,29 @@ def gerar_explicacao_humanizada(
         "avancado": explicacao_avancada,
         "razoes": razoes,
         "recomendacao": recomendacao,
-        "gerado_em": datetime.now().isoformat()
+        "gerado_em": datetime.now(timezone.utc).isoformat()
     }
 
 
+def gerar_explicacao_completa(
+    is_fraudulento: bool,
+    validacao: Dict,
+    predicao_ml: Dict,
+    dados_extraidos: Dict
+) -> Dict:
+    """
+    Gera explicação a partir do resultado final do pipeline (usado pelo worker)
+    O veredito combinado (FEBRABAN + ML) prevalece sobre o do modelo
+    """
+    predicao = dict(predicao_ml, is_fraudulento=is_fraudulento)
+    
+    return gerar_explicacao_humanizada(
+        dados_extraidos=dados_extraidos,
+        resultado_validacao=validacao,
+        predicao_ml=predicao
+    )
+
+
 def _identificar_principal_motivo(resultado_validacao: Dict, predicao_ml: Dict) -> str:
     """Identifica o principal motivo da classificação COM LINGUAGEM SUGESTIVA"""
     
@@ -294,36 +336,21 @@ def _determinar_gravidade(erro: str) -> str:
     """Determina a gravidade de um erro"""
     erro_lower = erro.lower()
     
-    if any(palavra in erro_lower for palavra in ['inválido', 'incorreto', 'falha crítica']):
-        return 'critica'
-    elif any(palavra in erro_lower for palavra in ['dígito verificador', 'código de barras']):
-        return 'alta'
-    elif any(palavra in erro_lower for palavra in ['formato', 'incompleto']):
-        return 'media'
-    else:
-        return 'baixa'
+    for gravidade, palavras in PALAVRAS_GRAVIDADE:
+        if any(palavra in erro_lower for palavra in palavras):
+            return gravidade
+    
+    return 'baixa'
 
 
 def _calcular_impacto(gravidade: str) -> int:
     """Calcula o impacto numérico baseado na gravidade"""
-    impactos = {
-        'critica': 95,
-        'alta': 80,
-        'media': 60,
-        'baixa': 30
-    }
-    return impactos.get(gravidade, 50)
+    return IMPACTO_GRAVIDADE.get(gravidade, 50)
 
 
 def _get_cor_gravidade(gravidade: str) -> str:
     """Retorna cor Ionic para gravidade"""
-    cores = {
-        'critica': 'danger',
-        'alta': 'warning',
-        'media': 'medium',
-        'baixa': 'primary'
-    }
-    return cores.get(gravidade, 'medium')
+    return CORES_GRAVIDADE.get(gravidade, 'medium')
 
 
 def _extrair_features_importantes(shap_values: np.ndarray, feature_names: List[str]) -> List[Dict]:
@@ -335,18 +362,19 @@ def _extrair_features_importantes(shap_values: np.ndarray, feature_names: List[s
         # Pegar valores absolutos médios
         importancias = np.abs(shap_values).mean(axis=0)
         
+        total = importancias.sum()
+        
         # Top 5 features
         top_indices = np.argsort(importancias)[-5:][::-1]
         
-        features_importantes = []
-        for idx in top_indices:
-            features_importantes.append({
+        return [
+            {
                 "nome": feature_names[idx],
                 "importancia": float(importancias[idx]),
-                "impacto_percentual": float(importancias[idx] / importancias.sum() * 100)
-            })
-        
-        return features_importantes
+                "impacto_percentual": float(importancias[idx] / total * 100)
+            }
+            for idx in top_indices
+        ]
     except Exception as e:
-        logger.error(f"Erro ao extrair features importantes: {e}")
+        logger.error("Erro ao extrair features importantes: %s", e)
         return []
@@ -2,21 +2,121 @@
 OCR - Extração de texto usando Tesseract
 """
 
+import os
+
+# Tesseract single-thread (definir antes de carregar a libtesseract)
+os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+
 import pytesseract
 from PIL import Image
 import io
-import base64
 import logging
-import os
+import queue
+import time
 from pdf2image import convert_from_bytes
 
+# tesserocr é opcional: mantém a API do Tesseract residente em memória
+try:
+    from tesserocr import PyTessBaseAPI, PSM, OEM
+except ImportError:
+    PyTessBaseAPI = None
+
 logger = logging.getLogger(__name__)
 
+# Pool de instâncias PyTessBaseAPI (None = usar pytesseract)
+_tess_pool = None
+_tess_instancias = []
+_tess_idioma = None
+
+# Modos que o SetImage do tesserocr consegue serializar (BMP/PNG)
+_MODOS_TESSEROCR = ('1', 'L', 'RGB', 'RGBA', 'LA', 'P')
+
 # Configurar caminho do Tesseract (Windows)
 if os.name == 'nt':  # Windows
     pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
 
+def iniciar_pool_tesseract(tamanho: int = 2, idioma: str = 'por') -> bool:
+    """
+    Pré-carrega instâncias do Tesseract para reutilizar entre chamadas
+    
+    Returns:
+        True se o pool foi criado, False se tesserocr não está disponível
+        ou falhou ao iniciar (nesses casos o pytesseract é usado)
+    """
+    global _tess_pool, _tess_instancias, _tess_idioma
+    
+    if PyTessBaseAPI is None:
+        logger.info("tesserocr não instalado, usando pytesseract")
+        return False
+    
+    instancias = []
+    try:
+        for _ in range(tamanho):
+            instancias.append(PyTessBaseAPI(lang=idioma, psm=PSM.SINGLE_BLOCK, oem=OEM.DEFAULT))
+    except Exception as e:
+        for api in instancias:
+            api.End()
+        logger.warning(f"⚠️ Pool Tesseract não iniciado, usando pytesseract: {str(e)}")
+        return False
+    
+    pool = queue.Queue()
+    for api in instancias:
+        pool.put(api)
+    
+    _tess_pool = pool
+    _tess_instancias = instancias
+    _tess_idioma = idioma
+    
+    logger.info(f"✅ Pool Tesseract iniciado ({tamanho} instâncias)")
+    return True
+
+
+def fechar_pool_tesseract(timeout: float = 30):
+    """
+    Libera as instâncias do pool do Tesseract
+    Aguarda (até timeout segundos) as instâncias em uso voltarem ao pool;
+    as que não voltarem a tempo não são liberadas (End() durante o OCR
+    de outra thread acessaria memória já liberada)
+    """
+    global _tess_pool, _tess_instancias
+    
+    if _tess_pool is None:
+        return
+    
+    pool, instancias = _tess_pool, _tess_instancias
+    _tess_pool, _tess_instancias = None, []
+    
+    limite = time.monotonic() + timeout
+    devolvidas = []
+    for _ in instancias:
+        try:
+            devolvidas.append(pool.get(timeout=max(0, limite - time.monotonic())))
+        except queue.Empty:
+            logger.warning(
+                "⚠️ %d instância(s) do Tesseract ainda em uso no desligamento",
+                len(instancias) - len(devolvidas)
+            )
+            break
+    
+    for api in devolvidas:
+        api.End()
+
+
+def _ocr_pool(pool: queue.Queue, imagem: Image.Image) -> str:
+    """Executa OCR com uma instância do pool (bloqueia até haver uma livre)"""
+    # SetImage serializa em BMP/PNG, que não suportam CMYK, I;16 etc.
+    if imagem.mode not in _MODOS_TESSEROCR:
+        imagem = imagem.convert('RGB')
+    
+    api = pool.get()
+    try:
+        api.SetImage(imagem)
+        return api.GetUTF8Text()
+    finally:
+        pool.put(api)
+
+
 def extrair_texto_tesseract(imagem_bytes: bytes, idioma: str = 'por') -> str:
     """
     Extrai texto de uma imagem ou PDF usando Tesseract OCR
@@ -43,15 +143,20 @@ def extrair_texto_tesseract(imagem_bytes: bytes, idioma: str = 'por') -> str:
                 raise Exception("Não foi possível converter PDF")
             imagem = imagens[0]
         
-        # Configuração do Tesseract
-        config = '--psm 6 --oem 3'
-        
-        # Extrair texto
-        texto = pytesseract.image_to_string(
-            imagem,
-            lang=idioma,
-            config=config
-        )
+        pool = _tess_pool
+        if pool is not None and idioma == _tess_idioma:
+            # Extrair texto com API residente
+            texto = _ocr_pool(pool, imagem)
+        else:
+            # Configuração do Tesseract
+            config = '--psm 6 --oem 3'
+            
+            # Extrair texto
+            texto = pytesseract.image_to_string(
+                imagem,
+                lang=idioma,
+                config=config
+            )
         
         logger.info(f"✅ OCR concluído. {len(texto)} caracteres extraídos")
         
@@ -60,17 +165,3 @@ def extrair_texto_tesseract(imagem_bytes: bytes, idioma: str = 'por') -> str:
     except Exception as e:
         logger.error(f"❌ Erro no OCR: {str(e)}")
         raise Exception(f"Erro ao extrair texto: {str(e)}")
-
-
-def extrair_texto_de_base64(base64_string: str, idioma: str = 'por') -> str:
-    """
-    Extrai texto de uma imagem em base64
-    """
-    
-    try:
-        imagem_bytes = base64.b64decode(base64_string)
-        return extrair_texto_tesseract(imagem_bytes, idioma)
-        
-    except Exception as e:
-        logger.error(f"❌ Erro ao processar base64: {str(e)}")
-        raise Exception(f"Erro ao processar base64: {str(e)}")
\ No newline at end of file
@@ -4,7 +4,6 @@ Tasks - Jobs que serão processados pelo worker
 
 from datetime import datetime
 import logging
-import base64
 
 # Imports do explainer
 from ml.explainer import gerar_explicacao_completa
@@ -12,13 +11,13 @@ from ml.explainer import gerar_explicacao_completa
 logger = logging.getLogger(__name__)
 
 
-def processar_boleto(analise_id: str, file_base64: str, file_type: str):
+def processar_boleto(analise_id: str, file_bytes: bytes, file_type: str):
     """
     Job principal: processa boleto completo
     
     Args:
         analise_id: ID da análise no MongoDB
-        file_base64: Arquivo em base64
+        file_bytes: Bytes do arquivo
         file_type: Tipo do arquivo (image/jpeg, application/pdf)
     
     Returns:
@@ -31,7 +30,7 @@ def processar_boleto(analise_id: str, file_base64: str, file_type: str):
         
         # Imports locais
         from database.mongodb import get_db
-        from ml.ocr import extrair_texto_de_base64
+        from ml.ocr import extrair_texto_tesseract
         from ml.parser import parse_dados_boleto
         from ml.validator import validar_boleto_febraban
         from ml.model import carregar_modelo, preparar_features, predizer_fraude
@@ -47,7 +46,7 @@ def processar_boleto(analise_id: str, file_base64: str, file_type: str):
         
         # 1. OCR - Extrair texto
         logger.info(f"[JOB] {analise_id} - Etapa 1: OCR")
-        texto = extrair_texto_de_base64(file_base64)
+        texto = extrair_texto_tesseract(file_bytes)
         
         # 2. Parser - Extrair dados estruturados
         logger.info(f"[JOB] {analise_id} - Etapa 2: Parser")
@@ -120,14 +119,27 @@ def processar_boleto(analise_id: str, file_base64: str, file_type: str):
         logger.error(f"[JOB] ❌ Erro no processamento {analise_id}: {str(e)}")
         
         # Salvar erro no MongoDB
-        db = get_db()
-        db.analises.update_one(
-            {'_id': analise_id},
-            {'$set': {
-                'status': 'failed',
-                'error': str(e),
-                'failedAt': datetime.utcnow()
-            }}
-        )
+        marcar_falha(analise_id, str(e))
         
-        raise
\ No newline at end of file
+        raise
+
+
+def marcar_falha(analise_id: str, erro: str):
+    """
+    Marca a análise como falha no MongoDB
+    
+    Args:
+        analise_id: ID da análise no MongoDB
+        erro: Mensagem de erro
+    """
+    from database.mongodb import get_db
+    
+    db = get_db()
+    db.analises.update_one(
+        {'_id': analise_id},
+        {'$set': {
+            'status': 'failed',
+            'error': erro,
+            'failedAt': datetime.utcnow()
+        }}
+    )
\ No newline at end of file
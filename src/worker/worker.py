@@ -8,14 +8,15 @@ import time
 import logging
 from threading import Thread
 from redis import Redis
-import json
+import orjson
 
 # Adicionar src ao path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import settings
 from database.mongodb import connect_mongodb
-from tasks import processar_boleto
+from ml.ocr import iniciar_pool_tesseract
+from tasks import processar_boleto, marcar_falha
 import asyncio
 
 # Logging
@@ -38,13 +39,26 @@ class SimpleWorker:
         """Processa um job"""
         try:
             analise_id = job_data['analise_id']
-            file_base64 = job_data['file_base64']
             file_type = job_data['file_type']
             
             logger.info(f"[WORKER] Processando job: {analise_id}")
             
+            # Buscar arquivo binário referenciado pelo job
+            file_key = f"boletos:file:{analise_id}"
+            pipe = self.redis_conn.pipeline(transaction=False)
+            pipe.get(file_key)
+            pipe.delete(file_key)
+            file_bytes, _ = pipe.execute()
+            
+            if file_bytes is None:
+                # Blob expirou (worker parado/atrasado além do TTL) ou foi perdido
+                erro = f"Arquivo não encontrado no Redis (expirado?): {file_key}"
+                logger.error(f"[WORKER] ❌ {erro}")
+                marcar_falha(analise_id, erro)
+                return
+            
             # Processar boleto
-            processar_boleto(analise_id, file_base64, file_type)
+            processar_boleto(analise_id, file_bytes, file_type)
             
             logger.info(f"[WORKER] ✅ Job concluído: {analise_id}")
             
@@ -63,7 +77,7 @@ class SimpleWorker:
                 
                 if result:
                     _, job_json = result
-                    job_data = json.loads(job_json)
+                    job_data = orjson.loads(job_json)
                     
                     # Processar em thread separada
                     thread = Thread(target=self.processar_job, args=(job_data,))
@@ -88,6 +102,9 @@ def main():
     loop.run_until_complete(connect_mongodb(settings.mongo_uri, settings.mongo_db_name))
     logger.info("✅ MongoDB conectado!")
     
+    # Pré-carregar Tesseract (se tesserocr disponível)
+    iniciar_pool_tesseract(settings.tesseract_pool_size)
+    
     # Iniciar worker
     worker = SimpleWorker()
     worker.run()
@@ -0,0 +1,35 @@
+"""
+Testes do sistema de explicabilidade
+"""
+
+import sys
+import os
+
+# Adicionar pasta src ao path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from ml.explainer import gerar_explicacao_completa
+
+
+def test_explicacao_completa_usa_veredito_combinado():
+    """Erro FEBRABAN torna o boleto suspeito mesmo com o ML dizendo válido"""
+    explicacao = gerar_explicacao_completa(
+        is_fraudulento=True,
+        validacao={'valido': False, 'erros': ['Dígito verificador inválido']},
+        predicao_ml={'is_fraudulento': False, 'score_fraude': 0.2, 'confianca': 0.8},
+        dados_extraidos={'valor': 150.0}
+    )
+    
+    assert explicacao['simples']['status'] == "POSSIVELMENTE FALSO"
+
+
+def test_explicacao_completa_autentico():
+    """Sem erros e sem fraude no ML, o boleto aparenta ser autêntico"""
+    explicacao = gerar_explicacao_completa(
+        is_fraudulento=False,
+        validacao={'valido': True, 'erros': []},
+        predicao_ml={'is_fraudulento': False, 'score_fraude': 0.1, 'confianca': 0.9},
+        dados_extraidos={'valor': 150.0}
+    )
+    
+    assert explicacao['simples']['status'] == "POSSIVELMENTE AUTÊNTICO"